@@ -1,17 +1,21 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import requests
+import requests_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
-import google.generativeai as genai
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import json
+import numpy as np
+import orjson
+import json_repair
 import time
-from datetime import datetime, timedelta
+import cProfile
 from dotenv import load_dotenv
-from streamlit_lottie import st_lottie
-from collections import Counter
-import base64
+from collections import Counter, namedtuple
+from operator import itemgetter
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # --- 1. PAGE CONFIGURATION ---
 st.set_page_config(
@@ -79,15 +83,44 @@ load_dotenv()
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 GEMINI_KEY = os.getenv("GEMINI_API_KEY")
 
+# Shared GitHub session: pooled keep-alive connections with retries on transient errors.
+# Responses are cached on disk and revalidated with ETag/If-None-Match once GitHub's
+# Cache-Control max-age expires, so unchanged data comes back as a cheap 304.
+@st.cache_resource(show_spinner=False)
+def get_session(token):
+    """Build the GitHub session once per server process and token, shared by reruns and users"""
+    session = requests_cache.CachedSession(
+        cache_name=".ghcache",
+        backend="sqlite",
+        expire_after=1800,
+        cache_control=True
+    )
+    session.headers.update({"Accept": "application/vnd.github+json"})
+    if token:
+        session.headers.update({"Authorization": f"token {token}"})
+    session.mount("https://", HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=32,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+    ))
+    return session
+
+SESSION = get_session(GITHUB_TOKEN)
+
+@st.cache_data(ttl=86400, show_spinner=False)
 def load_lottieurl(url: str):
-    r = requests.get(url)
-    if r.status_code != 200: return None
+    # Raises on timeout/non-200 so st.cache_data never caches a failed download
+    r = requests.get(url, timeout=2)
+    r.raise_for_status()
     return r.json()
 
+@st.cache_resource(show_spinner=False)
 def get_working_model():
-    """Finds a working model."""
+    """Finds a working model (looked up once per server process)."""
     if not GEMINI_KEY: return None
+    if os.getenv("GEMINI_MODEL"): return os.getenv("GEMINI_MODEL")
     try:
+        import google.generativeai as genai  # Deferred: slow to import, unused until Analyze
         genai.configure(api_key=GEMINI_KEY)
         for m in genai.list_models():
             if 'generateContent' in m.supported_generation_methods:
@@ -96,84 +129,130 @@ def get_working_model():
     except:
         return "models/gemini-1.5-flash"
 
-def calculate_documentation_score(repo):
-    """Calculate documentation quality score"""
-    score = 0
-    if repo.get('readme_exists', False): score += 40
-    if repo.get('description'): score += 20
-    if repo.get('homepage'): score += 10
-    if repo.get('has_wiki'): score += 15
-    if repo.get('has_pages'): score += 15
-    return min(score, 100)
-
-def calculate_code_quality_score(repo):
-    """Calculate code structure and quality score"""
-    score = 0
-    if repo.get('languages_count', 0) > 0: score += 20
-    if repo.get('has_issues', False): score += 15
-    if repo.get('has_projects', False): score += 15
-    if repo.get('size', 0) > 0: score += 25
-    if repo.get('stargazers_count', 0) > 0: score += 25
-    return min(score, 100)
-
-def calculate_activity_score(repo):
-    """Calculate commit frequency and consistency"""
-    score = 0
-    pushed_at = datetime.strptime(repo.get('pushed_at', '2000-01-01'), '%Y-%m-%dT%H:%M:%SZ')
-    days_since_update = (datetime.now() - pushed_at).days
-    
-    if days_since_update < 7: score += 40
-    elif days_since_update < 30: score += 30
-    elif days_since_update < 90: score += 20
-    else: score += 10
-    
-    if repo.get('open_issues_count', 0) > 0: score += 20
-    if repo.get('forks_count', 0) > 0: score += 20
-    if repo.get('watchers_count', 0) > 0: score += 20
-    
-    return min(score, 100)
-
-def get_readme_content(repo_full_name, headers):
+SCORE_COLUMNS = ['doc_score', 'code_score', 'activity_score']
+
+# Activity points by days since the last push: <7, <30, <90, older
+RECENCY_BUCKETS = np.array([7, 30, 90], dtype=np.int32)
+RECENCY_POINTS = np.array([40, 30, 20, 10], dtype=np.int32)
+
+def _flag(df, column):
+    """Truthiness of an optional repo field as a boolean column"""
+    if column not in df: return pd.Series(False, index=df.index)
+    return df[column].fillna(False).astype(bool)
+
+def _count(df, column):
+    """Numeric repo field with missing values as 0"""
+    if column not in df: return pd.Series(0, index=df.index)
+    return df[column].fillna(0)
+
+def _score_kernel(readme, has_desc, has_home, has_wiki, has_pages, lang_count,
+                  has_issues, has_projects, size, stars, forks, watchers, issues, days):
+    """Per-repo (doc, code, activity) scores over NumPy arrays"""
+    doc = np.minimum(
+        readme * 40 + has_desc * 20 + has_home * 10 + has_wiki * 15 + has_pages * 15, 100
+    )
+    code = np.minimum(
+        (lang_count > 0) * 20 + has_issues * 15 + has_projects * 15 +
+        (size > 0) * 25 + (stars > 0) * 25, 100
+    )
+    recency = RECENCY_POINTS[np.searchsorted(RECENCY_BUCKETS, days, side='right')]
+    activity = np.minimum(
+        recency + (issues > 0) * 20 + (forks > 0) * 20 + (watchers > 0) * 20, 100
+    )
+    return doc, code, activity
+
+def compute_scores(df):
+    """Calculate documentation, code quality and activity scores for every repo at once"""
+    df['pushed_dt'] = pd.to_datetime(df['pushed_at'], format='%Y-%m-%dT%H:%M:%SZ', utc=True)
+    # Never-pushed repos count as stale
+    df['days_since'] = (
+        (pd.Timestamp.now(tz='UTC') - df['pushed_dt']).dt.days
+        .fillna(np.iinfo(np.int32).max).astype(np.int32)
+    )
+    
+    flags = [
+        _flag(df, c).to_numpy(np.bool_)
+        for c in ('readme_exists', 'description', 'homepage', 'has_wiki', 'has_pages')
+    ]
+    doc, code, activity = _score_kernel(
+        *flags,
+        _count(df, 'languages_count').to_numpy(np.int64),
+        _flag(df, 'has_issues').to_numpy(np.bool_),
+        _flag(df, 'has_projects').to_numpy(np.bool_),
+        _count(df, 'size').to_numpy(np.int64),
+        _count(df, 'stargazers_count').to_numpy(np.int64),
+        _count(df, 'forks_count').to_numpy(np.int64),
+        _count(df, 'watchers_count').to_numpy(np.int64),
+        _count(df, 'open_issues_count').to_numpy(np.int64),
+        df['days_since'].to_numpy(np.int32)
+    )
+    df['doc_score'] = doc
+    df['code_score'] = code
+    df['activity_score'] = activity
+    
+    return df
+
+# README previews keep 500 characters; UTF-8 needs at most 4 bytes per character
+README_PREVIEW_CHARS = 500
+README_PREVIEW_BYTES = 4 * README_PREVIEW_CHARS
+
+def get_readme_content(repo_full_name):
     """Fetch README content for a repository"""
     try:
         readme_url = f"https://api.github.com/repos/{repo_full_name}/readme"
-        response = requests.get(readme_url, headers=headers)
-        if response.status_code == 200:
-            content = response.json().get('content', '')
-            return base64.b64decode(content).decode('utf-8')[:500]  # First 500 chars
+        # Raw media type skips the base64 JSON envelope; Range asks for the head only
+        response = SESSION.get(
+            readme_url,
+            headers={"Accept": "application/vnd.github.raw", "Range": f"bytes=0-{README_PREVIEW_BYTES - 1}"},
+            timeout=5
+        )
+        if response.status_code in (200, 206):  # 200 when the Range header is ignored
+            head = response.content[:README_PREVIEW_BYTES]
+            return head.decode('utf-8', errors='ignore')[:README_PREVIEW_CHARS]
     except:
         pass
     return None
 
-def get_commit_activity(repo_full_name, headers):
+def get_languages(languages_url):
+    """Fetch language byte counts for a repository"""
+    try:
+        response = SESSION.get(languages_url, timeout=10)
+        if response.status_code == 200:
+            return response.json()
+    except:
+        pass
+    return {}
+
+def get_commit_activity(repo_full_name):
     """Get commit activity for the last month"""
     try:
         url = f"https://api.github.com/repos/{repo_full_name}/stats/commit_activity"
-        response = requests.get(url, headers=headers)
+        response = SESSION.get(url, timeout=10)
         if response.status_code == 200:
             return response.json()
     except:
         pass
     return None
 
-def get_enhanced_github_data(username):
-    """Enhanced GitHub data fetching with more metrics"""
-    if not GITHUB_TOKEN: return "NO_TOKEN"
-    headers = {"Authorization": f"token {GITHUB_TOKEN}"}
-    
+class GitHubFetchError(Exception):
+    """Raised instead of returning an error value so st.cache_data never caches a failure"""
+
+def fetch_via_rest(username):
+    """Fetch profile, repositories and organizations through the REST API"""
     try:
         # Get user data
-        user_res = requests.get(f"https://api.github.com/users/{username}", headers=headers)
-        if user_res.status_code != 200: return "ERROR"
+        user_res = SESSION.get(f"https://api.github.com/users/{username}", timeout=10)
+        if user_res.status_code != 200:
+            raise GitHubFetchError("❌ User not found or API rate limit exceeded. Please try again later.")
         user_data = user_res.json()
         
         # Get repositories with pagination
         repos = []
         page = 1
         while len(repos) < 50:  # Get up to 50 repos
-            repos_res = requests.get(
+            repos_res = SESSION.get(
                 f"https://api.github.com/users/{username}/repos?sort=updated&per_page=30&page={page}", 
-                headers=headers
+                timeout=10
             )
             if repos_res.status_code != 200: break
             page_repos = repos_res.json()
@@ -181,58 +260,191 @@ def get_enhanced_github_data(username):
             repos.extend(page_repos)
             page += 1
         
-        # Enhance repository data
-        enhanced_repos = []
-        for repo in repos:
-            # Check for README
-            repo_full_name = repo['full_name']
-            readme = get_readme_content(repo_full_name, headers)
-            repo['readme_exists'] = readme is not None
-            repo['readme_preview'] = readme
-            
-            # Get languages
-            lang_url = repo['languages_url']
-            lang_res = requests.get(lang_url, headers=headers)
-            repo['languages'] = lang_res.json() if lang_res.status_code == 200 else {}
-            repo['languages_count'] = len(repo['languages'])
-            
-            # Get commit activity
-            commits = get_commit_activity(repo_full_name, headers)
-            repo['commit_activity'] = commits
-            
-            # Calculate scores
-            repo['doc_score'] = calculate_documentation_score(repo)
-            repo['code_score'] = calculate_code_quality_score(repo)
-            repo['activity_score'] = calculate_activity_score(repo)
-            
-            enhanced_repos.append(repo)
+        # Enhance repository data (README, languages and commits for every repo in parallel)
+        fetchers = {
+            'readme': lambda r: get_readme_content(r['full_name']),
+            'languages': lambda r: get_languages(r['languages_url']),
+            'commits': lambda r: get_commit_activity(r['full_name']),
+        }
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            futures = {
+                executor.submit(fetch, repo): (idx, kind)
+                for idx, repo in enumerate(repos)
+                for kind, fetch in fetchers.items()
+            }
+            for future in as_completed(futures):
+                idx, kind = futures[future]
+                repo = repos[idx]
+                result = future.result()
+                if kind == 'readme':
+                    repo['readme_exists'] = result is not None
+                    repo['readme_preview'] = result
+                elif kind == 'languages':
+                    repo['languages'] = result
+                    repo['languages_count'] = len(result)
+                else:
+                    repo['commit_activity'] = result
         
         # Get organizations
-        orgs_res = requests.get(f"https://api.github.com/users/{username}/orgs", headers=headers)
+        orgs_res = SESSION.get(f"https://api.github.com/users/{username}/orgs", timeout=10)
         orgs = orgs_res.json() if orgs_res.status_code == 200 else []
         
         return {
             "user": user_data, 
-            "repos": enhanced_repos,
+            "repos": repos,
             "orgs": orgs
         }
+    except GitHubFetchError:
+        raise
     except Exception as e:
-        st.error(f"Error fetching data: {str(e)}")
-        return "ERROR"
+        raise GitHubFetchError(f"Error fetching data: {str(e)}") from e
+
+GRAPHQL_QUERY = """
+query($login: String!) {
+  user(login: $login) {
+    login name bio location avatarUrl url createdAt updatedAt
+    followers { totalCount }
+    following { totalCount }
+    repositories(first: 50, ownerAffiliations: OWNER, privacy: PUBLIC,
+                 orderBy: {field: UPDATED_AT, direction: DESC}) {
+      totalCount
+      nodes {
+        name nameWithOwner description homepageUrl url
+        hasWikiEnabled hasIssuesEnabled hasProjectsEnabled isArchived diskUsage
+        stargazerCount forkCount
+        watchers { totalCount }
+        issues(states: OPEN) { totalCount }
+        pagesDeployments: deployments(environments: ["github-pages"], first: 1) { totalCount }
+        createdAt updatedAt pushedAt
+        primaryLanguage { name }
+        languages(first: 20) { edges { size node { name } } }
+        readmeMd: object(expression: "HEAD:README.md") { ... on Blob { text } }
+        readmeLower: object(expression: "HEAD:readme.md") { ... on Blob { text } }
+        readmeTitle: object(expression: "HEAD:Readme.md") { ... on Blob { text } }
+        readmeRst: object(expression: "HEAD:README.rst") { ... on Blob { text } }
+        readmeBare: object(expression: "HEAD:README") { ... on Blob { text } }
+      }
+    }
+    organizations(first: 10) { nodes { login } }
+  }
+}
+"""
+# Common README filenames looked up by GraphQL (the REST /readme endpoint finds any of them)
+README_ALIASES = ('readmeMd', 'readmeLower', 'readmeTitle', 'readmeRst', 'readmeBare')
+
+def fetch_via_graphql(username):
+    """Fetch profile, repos, languages and READMEs in one GraphQL query (None on error)"""
+    try:
+        response = SESSION.post(
+            "https://api.github.com/graphql",
+            json={"query": GRAPHQL_QUERY, "variables": {"login": username}},
+            timeout=20
+        )
+        if response.status_code != 200: return None
+        payload = response.json()
+        if payload.get('errors') or not (payload.get('data') or {}).get('user'): return None
+        user = payload['data']['user']
+    except:
+        return None
+    
+    # Map onto the REST field names used by the scoring functions and the UI
+    user_data = {
+        'login': user['login'],
+        'name': user['name'],
+        'bio': user['bio'],
+        'location': user['location'],
+        'avatar_url': user['avatarUrl'],
+        'html_url': user['url'],
+        'followers': user['followers']['totalCount'],
+        'following': user['following']['totalCount'],
+        'public_repos': user['repositories']['totalCount'],
+        'created_at': user['createdAt'],
+        'updated_at': user['updatedAt']
+    }
+    
+    repos = []
+    for node in user['repositories']['nodes']:
+        languages = {e['node']['name']: e['size'] for e in node['languages']['edges']}
+        readme = next(
+            (node[a]['text'] for a in README_ALIASES if (node[a] or {}).get('text') is not None),
+            None
+        )
+        repos.append({
+            'name': node['name'],
+            'full_name': node['nameWithOwner'],
+            'html_url': node['url'],
+            'description': node['description'],
+            'homepage': node['homepageUrl'],
+            'has_wiki': node['hasWikiEnabled'],
+            'has_issues': node['hasIssuesEnabled'],
+            'has_projects': node['hasProjectsEnabled'],
+            # No hasPages field in GraphQL; a github-pages deployment means Pages is published
+            'has_pages': node['pagesDeployments']['totalCount'] > 0,
+            'archived': node['isArchived'],
+            'size': node['diskUsage'] or 0,
+            'stargazers_count': node['stargazerCount'],
+            'forks_count': node['forkCount'],
+            'watchers_count': node['stargazerCount'],  # REST watchers_count mirrors stars
+            'subscribers_count': node['watchers']['totalCount'],
+            'open_issues_count': node['issues']['totalCount'],
+            'language': (node['primaryLanguage'] or {}).get('name'),
+            'languages': languages,
+            'languages_count': len(languages),
+            'readme_exists': readme is not None,
+            'readme_preview': readme[:README_PREVIEW_CHARS] if readme is not None else None,
+            'commit_activity': None,  # Not exposed by GraphQL
+            'created_at': node['createdAt'],
+            'updated_at': node['updatedAt'],
+            'pushed_at': node['pushedAt'] or node['createdAt']
+        })
+    
+    return {
+        "user": user_data,
+        "repos": repos,
+        "orgs": user['organizations']['nodes']
+    }
+
+@st.cache_data(ttl=1800, show_spinner=False)
+def get_enhanced_github_data(username):
+    """Enhanced GitHub data fetching with more metrics (cached for 30 minutes)"""
+    if not GITHUB_TOKEN:
+        raise GitHubFetchError("⚠️ GitHub Token not configured. Please check your .env file.")
+    
+    # One GraphQL round-trip when possible, per-repo REST calls otherwise
+    data = fetch_via_graphql(username) or fetch_via_rest(username)
+    
+    # Calculate scores
+    if data['repos']:
+        df = compute_scores(pd.DataFrame(data['repos']))
+        for repo, scores in zip(data['repos'], df[SCORE_COLUMNS].to_dict('records')):
+            repo.update(scores)
+        data['repos_df'] = df[['name', 'stargazers_count', 'forks_count', 'pushed_dt'] + SCORE_COLUMNS]
+    
+    # Count repos per language once, shared by scoring and the UI
+    lang_counter = Counter()
+    for repo in data['repos']:
+        lang_counter.update(repo.get('languages', {}).keys())
+    data['lang_counter'] = lang_counter
+    data['unique_languages'] = len(lang_counter)
+    data['repos_by_name'] = {r['name']: r for r in data['repos']}
+    
+    data['fetched_at'] = time.time()
+    return data
 
 def calculate_portfolio_score(data):
     """Calculate comprehensive portfolio score"""
-    if not data or data in ["ERROR", "NO_TOKEN"]:
+    if not data:
         return 0, {}
     
     repos = data.get('repos', [])
     if not repos:
         return 0, {}
     
-    # Calculate average scores
-    doc_score = sum(r.get('doc_score', 0) for r in repos) / len(repos)
-    code_score = sum(r.get('code_score', 0) for r in repos) / len(repos)
-    activity_score = sum(r.get('activity_score', 0) for r in repos) / len(repos)
+    # Calculate average scores and impact totals
+    repos_df = data['repos_df']
+    doc_score, code_score, activity_score = repos_df[SCORE_COLUMNS].mean()
+    total_stars = repos_df['stargazers_count'].sum()
+    total_forks = repos_df['forks_count'].sum()
     
     # Repository organization score
     org_score = 0
@@ -244,16 +456,11 @@ def calculate_portfolio_score(data):
     pinned_score = 30  # Default
     
     # Impact score
-    total_stars = sum(r.get('stargazers_count', 0) for r in repos)
-    total_forks = sum(r.get('forks_count', 0) for r in repos)
     impact_score = min(100, (total_stars * 2 + total_forks) / 5)
     
     # Technical depth score
     tech_score = 0
-    languages = set()
-    for repo in repos:
-        languages.update(repo.get('languages', {}).keys())
-    tech_score += min(40, len(languages) * 8)
+    tech_score += min(40, data['unique_languages'] * 8)
     
     weights = {
         'documentation': 0.20,
@@ -324,35 +531,72 @@ def get_actionable_recommendations(data, dimension_scores):
     
     return recommendations[:5]  # Return top 5
 
-def analyze_with_ai(data, model_name):
-    """Enhanced AI analysis with more metrics"""
-    if not model_name: return None
-    model = genai.GenerativeModel(model_name, generation_config={"temperature": 0.2})
-    
-    repo_summary = [f"{r['name']} ({r.get('language','N/A')}) - ⭐{r.get('stargazers_count',0)}" for r in data['repos'][:10]]
-    langs = list(set([r.get('language') for r in data['repos'] if r.get('language')]))
-    
-    prompt = f"""
+# Gemini structured-output schema. Skill maps are requested as name/score
+# lists because the schema has no free-form object type.
+_SKILL_SCORES = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {"name": {"type": "STRING"}, "score": {"type": "INTEGER"}},
+        "required": ["name", "score"]
+    }
+}
+AI_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "score": {"type": "INTEGER"},
+        "verdict": {"type": "STRING"},
+        "role": {"type": "STRING"},
+        "summary": {"type": "STRING"},
+        "skills": _SKILL_SCORES,
+        "soft_skills": _SKILL_SCORES,
+        "pros": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "cons": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "interview_questions": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "archive_repos": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {"name": {"type": "STRING"}, "reason": {"type": "STRING"}},
+                "required": ["name", "reason"]
+            }
+        },
+        "improve_repos": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {"name": {"type": "STRING"}, "improvement": {"type": "STRING"}},
+                "required": ["name", "improvement"]
+            }
+        }
+    },
+    "required": [
+        "score", "verdict", "role", "summary", "skills", "soft_skills", "pros", "cons",
+        "interview_questions", "archive_repos", "improve_repos"
+    ]
+}
+
+_PROMPT_TMPL = """
     Act as a VP of Engineering at a top tech company. Analyze this GitHub profile thoroughly.
     
     USER PROFILE:
-    Username: {data['user']['login']}
-    Name: {data['user'].get('name', 'N/A')}
-    Bio: {data['user'].get('bio', 'None')}
-    Location: {data['user'].get('location', 'N/A')}
-    Followers: {data['user']['followers']}
-    Following: {data['user']['following']}
-    Public Repos: {data['user']['public_repos']}
-    Account Created: {data['user']['created_at'][:10]}
+    Username: {login}
+    Name: {name}
+    Bio: {bio}
+    Location: {location}
+    Followers: {followers}
+    Following: {following}
+    Public Repos: {public_repos}
+    Account Created: {created}
     
     TOP REPOSITORIES (with stars):
-    {chr(10).join(repo_summary)}
+    {repo_block}
     
-    LANGUAGES USED: {', '.join(langs) if langs else 'None'}
+    LANGUAGES USED: {lang_block}
     
-    ORGANIZATIONS: {len(data.get('orgs', []))}
+    ORGANIZATIONS: {org_count}
     
-    Based on this data, provide a detailed JSON analysis with:
+    Based on this data, provide a detailed analysis with:
     1. Overall score (0-100)
     2. Verdict (Hire/Strong Consider/Interview/Cultivate/Pass)
     3. Best fitting job role
@@ -364,37 +608,232 @@ def analyze_with_ai(data, model_name):
     9. 5 specific interview questions based on their actual projects
     10. 3 repos to archive (with reasons)
     11. 3 repos to improve (with specific improvements)
-    
-    RETURN STRICT JSON (No Markdown):
-    {{
-        "score": 0,
-        "verdict": "Verdict",
-        "role": "Best Fitting Role",
-        "summary": "Executive summary here",
-        "skills": {{"Python": 90, "React": 80}},
-        "soft_skills": {{"Communication": 70, "Leadership": 60}},
-        "pros": ["strength1", "strength2", "strength3", "strength4", "strength5"],
-        "cons": ["redflag1", "redflag2", "redflag3", "redflag4", "redflag5"],
-        "interview_questions": ["Q1 based on their projects", "Q2", "Q3", "Q4", "Q5"],
-        "archive_repos": [{{"name": "repo1", "reason": "why to archive"}}],
-        "improve_repos": [{{"name": "repo2", "improvement": "specific improvement"}}]
-    }}
     """
-    
+
+def parse_ai_json(text):
+    """Extract the JSON object from a model response, repairing minor syntax errors"""
+    start, end = text.find('{'), text.rfind('}')
+    if start == -1 or end < start:
+        raise ValueError("No JSON object found in AI response")
+    payload = text[start:end + 1]
     try:
-        response = model.generate_content(prompt)
-        text = response.text.replace("```json", "").replace("```", "").strip()
-        return json.loads(text)
-    except Exception as e:
-        st.error(f"AI Analysis Error: {str(e)}")
-        return None
+        return orjson.loads(payload)
+    except orjson.JSONDecodeError:
+        return orjson.loads(json_repair.repair_json(payload))
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def analyze_with_ai(_data, model_name, data_version):
+    """Enhanced AI analysis with more metrics (cached per model and data_version)"""
+    if not model_name: return None
+    data = _data  # Not hashed by st.cache_data; data_version identifies it
+    import google.generativeai as genai
+    genai.configure(api_key=GEMINI_KEY)  # get_working_model may skip configuring (GEMINI_MODEL)
+    model = genai.GenerativeModel(model_name, generation_config={
+        "temperature": 0.2,
+        "response_mime_type": "application/json",
+        "response_schema": AI_RESPONSE_SCHEMA
+    })
+    
+    repo_summary = [f"{r['name']} ({r.get('language','N/A')}) - ⭐{r.get('stargazers_count',0)}" for r in data['repos'][:10]]
+    langs = {r['language'] for r in data['repos'] if r.get('language')}
+    user = data['user']
+    
+    prompt = _PROMPT_TMPL.format(
+        login=user['login'],
+        name=user.get('name', 'N/A'),
+        bio=user.get('bio', 'None'),
+        location=user.get('location', 'N/A'),
+        followers=user['followers'],
+        following=user['following'],
+        public_repos=user['public_repos'],
+        created=user['created_at'][:10],
+        repo_block="\n".join(repo_summary),
+        lang_block=', '.join(sorted(langs)) if langs else 'None',
+        org_count=len(data.get('orgs', []))
+    )
+    
+    # Errors propagate so a failed call is retried on the next rerun instead of cached
+    response = model.generate_content(prompt)
+    result = parse_ai_json(response.text)
+    # Skills come back as name/score lists; the UI expects {name: score}
+    for key in ('skills', 'soft_skills'):
+        if isinstance(result.get(key), list):
+            result[key] = {s['name']: s['score'] for s in result[key]}
+    return result
+
+# Immutable per-repo row for the export report
+ReportRepo = namedtuple('ReportRepo', 'name stargazers_count forks_count doc_score')
+# Pulls a ReportRepo's fields out of a repo dict in one C-level call
+_report_fields = itemgetter(*ReportRepo._fields)
+
+# Export format -> (MIME type, file extension)
+EXPORT_FORMATS = {
+    'JSON': ('application/json', 'json'),
+    'MessagePack': ('application/msgpack', 'msgpack'),
+    'CBOR': ('application/cbor', 'cbor')
+}
+
+def _build_report(username, portfolio_score, dimension_scores, ai_result, repos_slice,
+                  pretty=False, fmt='JSON'):
+    """Serialize the analysis report in an EXPORT_FORMATS format; repos_slice holds ReportRepo rows"""
+    report = {
+        'username': username,
+        'portfolio_score': portfolio_score,
+        'dimension_scores': dimension_scores,
+        'ai_analysis': ai_result,
+        # Columnar: one list per field instead of one dict per repo
+        'repositories': {
+            'name': [r.name for r in repos_slice],
+            'stars': [r.stargazers_count for r in repos_slice],
+            'forks': [r.forks_count for r in repos_slice],
+            'doc_score': [r.doc_score for r in repos_slice]
+        }
+    }
+    if fmt == 'MessagePack':
+        import msgpack
+        return msgpack.packb(report, use_bin_type=True)
+    if fmt == 'CBOR':
+        import cbor2
+        return cbor2.dumps(report)
+    
+    # Compact by default; indentation only when asked for
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+    if pretty:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(report, option=option)
+
+# PROFILE: set GITAUDIT_PROFILE=1 to dump each report build to export.prof (view with
+# snakeviz) and optimize whatever dominates, cheapest fix first:
+#   encoding       -> orjson options / binary format (already orjson, compact by default)
+#   st.* calls     -> batch into a single st.markdown (see Key Takeaways)
+#   row building   -> itemgetter + columnar lists (see _report_fields)
+# Only reach for compiled extensions once a profile shows the Python side still dominates.
+def _maybe_profile(func, *args):
+    """Run func(*args), dumping a cProfile to export.prof when GITAUDIT_PROFILE is set"""
+    if not os.getenv("GITAUDIT_PROFILE"):
+        return func(*args)
+    with cProfile.Profile() as profiler:
+        result = func(*args)
+    profiler.dump_stats('export.prof')
+    return result
+
+# --- CHART BUILDERS (cached so reruns and tab switches reuse the figures) ---
+# Plotly is imported inside each builder so it only loads on a cache miss.
+@st.cache_data(show_spinner=False)
+def build_radar(dimension_items: tuple):
+    """Radar chart of (dimension, score) pairs"""
+    import plotly.graph_objects as go
+    fig = go.Figure(data=go.Scatterpolar(
+        r=[score for _, score in dimension_items],
+        theta=[name for name, _ in dimension_items],
+        fill='toself',
+        marker=dict(color='rgba(0, 255, 255, 0.8)')
+    ))
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 100]
+            )),
+        showlegend=False,
+        paper_bgcolor="rgba(0,0,0,0)",
+        font_color="white"
+    )
+    return fig
+
+@st.cache_data(show_spinner=False)
+def build_lang_pie(lang_counter_items: tuple):
+    """Donut chart of how many repos use each language (first 8)"""
+    import plotly.express as px
+    df_langs = pd.DataFrame(
+        list(lang_counter_items), 
+        columns=['Language', 'Count']
+    ).head(8)
+    
+    fig = px.pie(
+        df_langs, 
+        values='Count', 
+        names='Language',
+        color_discrete_sequence=px.colors.qualitative.Set3,
+        hole=0.4
+    )
+    fig.update_layout(
+        paper_bgcolor="rgba(0,0,0,0)",
+        font_color="white"
+    )
+    return fig
+
+@st.cache_data(show_spinner=False)
+def build_stars_bar(repo_stars: tuple):
+    """Bar chart of (repository, stars) pairs"""
+    import plotly.express as px
+    df_activity = pd.DataFrame(list(repo_stars), columns=['Repository', 'Stars'])
+    fig = px.bar(
+        df_activity, 
+        x='Repository', 
+        y='Stars',
+        title='Repository Stars',
+        color='Stars',
+        color_continuous_scale='Viridis'
+    )
+    fig.update_layout(
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font_color="white"
+    )
+    return fig
+
+@st.cache_data(show_spinner=False)
+def build_repo_lang_pie(language_items: tuple):
+    """Donut chart of a single repo's (language, bytes) pairs"""
+    import plotly.express as px
+    lang_df = pd.DataFrame(
+        list(language_items), 
+        columns=['Language', 'Bytes']
+    )
+    fig = px.pie(
+        lang_df, 
+        values='Bytes', 
+        names='Language',
+        hole=0.3
+    )
+    fig.update_layout(
+        paper_bgcolor="rgba(0,0,0,0)",
+        font_color="white",
+        height=300
+    )
+    return fig
+
+@st.cache_data(show_spinner=False)
+def build_skills_bar(skill_items: tuple, color_scale: str):
+    """Horizontal bar chart of (skill, proficiency) pairs"""
+    import plotly.express as px
+    skills_df = pd.DataFrame(
+        list(skill_items),
+        columns=['Skill', 'Proficiency']
+    )
+    fig = px.bar(
+        skills_df,
+        x='Proficiency',
+        y='Skill',
+        orientation='h',
+        color='Proficiency',
+        color_continuous_scale=color_scale
+    )
+    fig.update_layout(
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font_color="white",
+        height=300
+    )
+    return fig
 
 # --- 4. UI LAYOUT ---
 st.title("⚡ GitAudit **Ultra**")
 st.markdown("##### AI-Powered Technical Recruiter & Portfolio Analyzer")
 
 # Input Section with Enhanced UI
-c1, c2, c3 = st.columns([3, 1, 1])
+c1, c2, c3, c4 = st.columns([3, 1, 1, 1])
 with c1:
     username = st.text_input("GitHub Username", placeholder="e.g. octocat", key="username_input")
 with c2:
@@ -404,361 +843,290 @@ with c3:
     st.write("##")
     if st.button("🎯 SAMPLE DEMO", use_container_width=True):
         username = "torvalds"  # Demo with Linus Torvalds
+with c4:
+    st.write("##")
+    refresh_btn = st.button("🔄 FORCE REFRESH", use_container_width=True)
+
+if refresh_btn:
+    # Drop cached GitHub data so the analysis below re-fetches it
+    get_enhanced_github_data.clear()
+    analyze_btn = True
 
 # Load animation
-lottie_scanning = load_lottieurl("https://assets9.lottiefiles.com/packages/lf20_w51pcehl.json")
+try:
+    lottie_scanning = load_lottieurl("https://assets9.lottiefiles.com/packages/lf20_w51pcehl.json")
+except requests.RequestException:
+    lottie_scanning = None
 
 if analyze_btn:
     if not username:
         st.warning("Please enter a GitHub username!")
     else:
-        # Animation
-        if lottie_scanning:
-            st_lottie(lottie_scanning, height=200, key="scanning")
+        # Remember the profile so later reruns (tabs, export, ...) keep showing the dashboard
+        st.session_state['analyzed_username'] = username
+
+if st.session_state.get('analyzed_username'):
+    username = st.session_state['analyzed_username']
+    # Animation (fresh analyses only; reruns are served from cache)
+    if analyze_btn and lottie_scanning:
+        from streamlit_lottie import st_lottie
+        st_lottie(lottie_scanning, height=200, loop=True, key="scanning")
+    
+    with st.spinner("🔍 Scanning GitHub repositories... Analyzing code quality..."):
+        # Get enhanced data, resolving the Gemini model in parallel
+        with ThreadPoolExecutor(
+            max_workers=1,
+            initializer=add_script_run_ctx,
+            initargs=(None, get_script_run_ctx())
+        ) as executor:
+            model_future = executor.submit(get_working_model)
+            try:
+                data = get_enhanced_github_data(username)
+                fetch_error = None
+            except GitHubFetchError as e:
+                data, fetch_error = None, str(e)
         
-        with st.spinner("🔍 Scanning GitHub repositories... Analyzing code quality..."):
-            time.sleep(1)
+        if fetch_error:
+            st.error(fetch_error)
+            st.session_state.pop('analyzed_username', None)
+        else:
+            # Calculate portfolio score
+            portfolio_score, dimension_scores = calculate_portfolio_score(data)
             
-            # Get enhanced data
-            data = get_enhanced_github_data(username)
+            # Get AI analysis
+            model = model_future.result()
+            data_version = f"{data['user']['login']}@{data['fetched_at']}"
+            try:
+                ai_result = analyze_with_ai(data, model, data_version)
+            except Exception as e:
+                st.error(f"AI Analysis Error: {str(e)}")
+                ai_result = None
             
-            if data == "ERROR":
-                st.error("❌ User not found or API rate limit exceeded. Please try again later.")
-            elif data == "NO_TOKEN":
-                st.error("⚠️ GitHub Token not configured. Please check your .env file.")
-            else:
-                # Calculate portfolio score
-                portfolio_score, dimension_scores = calculate_portfolio_score(data)
-                
-                # Get AI analysis
-                model = get_working_model()
-                ai_result = analyze_with_ai(data, model)
-                
-                # Get actionable recommendations
-                recommendations = get_actionable_recommendations(data, dimension_scores)
-                
-                # Success animation
+            # Get actionable recommendations
+            recommendations = get_actionable_recommendations(data, dimension_scores)
+            
+            # Success animation
+            if analyze_btn:
                 st.balloons()
-                st.success(f"✅ Analysis complete for @{username}")
-                
-                # --- MAIN DASHBOARD ---
-                
-                # Top Metrics Row
-                col1, col2, col3, col4, col5 = st.columns(5)
-                
-                with col1:
-                    st.metric("📊 Portfolio Score", f"{portfolio_score}/100", 
-                             delta="Top 10%" if portfolio_score > 80 else None)
-                
-                with col2:
-                    st.metric("📚 Total Repos", data['user']['public_repos'])
+            st.success(f"✅ Analysis complete for @{username}")
+            minutes_ago = int((time.time() - data['fetched_at']) // 60)
+            st.caption(f"🕒 GitHub data last updated {minutes_ago} min ago — use Force Refresh to re-fetch")
+            
+            # --- MAIN DASHBOARD ---
+            
+            # Top Metrics Row
+            col1, col2, col3, col4, col5 = st.columns(5)
+            
+            with col1:
+                st.metric("📊 Portfolio Score", f"{portfolio_score}/100", 
+                         delta="Top 10%" if portfolio_score > 80 else None)
+            
+            with col2:
+                st.metric("📚 Total Repos", data['user']['public_repos'])
+            
+            with col3:
+                total_stars = sum(r.get('stargazers_count', 0) for r in data['repos'])
+                st.metric("⭐ Total Stars", total_stars)
+            
+            with col4:
+                st.metric("👥 Followers", data['user']['followers'])
+            
+            with col5:
+                if ai_result:
+                    st.metric("🎯 AI Verdict", ai_result['verdict'])
+            
+            st.markdown("---")
+            
+            # Tabbed Interface
+            tab1, tab2, tab3, tab4 = st.tabs([
+                "📈 Portfolio Overview", 
+                "🔍 Repository Analysis", 
+                "💡 Recommendations",
+                "🎤 Interview Prep"
+            ])
+            
+            with tab1:
+                # Portfolio Overview Tab
+                col_left, col_right = st.columns([2, 1])
                 
-                with col3:
-                    total_stars = sum(r.get('stargazers_count', 0) for r in data['repos'])
-                    st.metric("⭐ Total Stars", total_stars)
+                with col_left:
+                    st.subheader("🎯 Dimension-wise Scores")
+                    
+                    # Create radar chart for dimensions
+                    st.plotly_chart(build_radar(tuple(dimension_scores.items())), use_container_width=True)
                 
-                with col4:
-                    st.metric("👥 Followers", data['user']['followers'])
+                with col_right:
+                    st.subheader("📊 Language Distribution")
+                    lang_counts = data['lang_counter']
+                    
+                    if lang_counts:
+                        st.plotly_chart(build_lang_pie(tuple(lang_counts.items())), use_container_width=True)
                 
-                with col5:
-                    if ai_result:
-                        st.metric("🎯 AI Verdict", ai_result['verdict'])
+                # Profile Summary
+                st.subheader("📋 Profile Summary")
+                if ai_result:
+                    st.info(ai_result['summary'])
                 
-                st.markdown("---")
+                # Activity Timeline
+                st.subheader("📅 Recent Activity")
+                repo_stars = tuple(
+                    data['repos_df'].nlargest(10, 'pushed_dt')[['name', 'stargazers_count']]
+                    .itertuples(index=False, name=None)
+                )
+                st.plotly_chart(build_stars_bar(repo_stars), use_container_width=True)
+            
+            with tab2:
+                # Repository Analysis Tab
+                st.subheader("📁 Repository Deep Dive")
                 
-                # Tabbed Interface
-                tab1, tab2, tab3, tab4 = st.tabs([
-                    "📈 Portfolio Overview", 
-                    "🔍 Repository Analysis", 
-                    "💡 Recommendations",
-                    "🎤 Interview Prep"
-                ])
+                # Repository selector
+                repo_names = [r['name'] for r in data['repos']]
+                selected_repo = st.selectbox("Select Repository to Analyze", repo_names)
                 
-                with tab1:
-                    # Portfolio Overview Tab
-                    col_left, col_right = st.columns([2, 1])
-                    
-                    with col_left:
-                        st.subheader("🎯 Dimension-wise Scores")
-                        
-                        # Create radar chart for dimensions
-                        fig = go.Figure(data=go.Scatterpolar(
-                            r=list(dimension_scores.values()),
-                            theta=list(dimension_scores.keys()),
-                            fill='toself',
-                            marker=dict(color='rgba(0, 255, 255, 0.8)')
-                        ))
-                        fig.update_layout(
-                            polar=dict(
-                                radialaxis=dict(
-                                    visible=True,
-                                    range=[0, 100]
-                                )),
-                            showlegend=False,
-                            paper_bgcolor="rgba(0,0,0,0)",
-                            font_color="white"
-                        )
-                        st.plotly_chart(fig, use_container_width=True)
+                if selected_repo:
+                    repo = data['repos_by_name'][selected_repo]
                     
-                    with col_right:
-                        st.subheader("📊 Language Distribution")
-                        all_langs = []
-                        for repo in data['repos']:
-                            all_langs.extend(repo.get('languages', {}).keys())
-                        
-                        if all_langs:
-                            lang_counts = Counter(all_langs)
-                            df_langs = pd.DataFrame(
-                                list(lang_counts.items()), 
-                                columns=['Language', 'Count']
-                            ).head(8)
-                            
-                            fig = px.pie(
-                                df_langs, 
-                                values='Count', 
-                                names='Language',
-                                color_discrete_sequence=px.colors.qualitative.Set3,
-                                hole=0.4
-                            )
-                            fig.update_layout(
-                                paper_bgcolor="rgba(0,0,0,0)",
-                                font_color="white"
-                            )
-                            st.plotly_chart(fig, use_container_width=True)
+                    col1, col2, col3 = st.columns(3)
+                    col1.metric("📝 Documentation", f"{repo['doc_score']}/100")
+                    col2.metric("💻 Code Quality", f"{repo['code_score']}/100")
+                    col3.metric("⚡ Activity", f"{repo['activity_score']}/100")
                     
-                    # Profile Summary
-                    st.subheader("📋 Profile Summary")
-                    if ai_result:
-                        st.info(ai_result['summary'])
+                    # Repository details
+                    st.write("---")
+                    col_left, col_right = st.columns(2)
                     
-                    # Activity Timeline
-                    st.subheader("📅 Recent Activity")
-                    repo_updates = []
-                    for repo in data['repos'][:10]:
-                        pushed_at = datetime.strptime(repo['pushed_at'], '%Y-%m-%dT%H:%M:%SZ')
-                        repo_updates.append({
-                            'Repository': repo['name'],
-                            'Last Updated': pushed_at,
-                            'Stars': repo['stargazers_count']
-                        })
+                    with col_left:
+                        st.write("**Repository Stats**")
+                        st.markdown("\n".join([
+                            f"- ⭐ Stars: {repo['stargazers_count']}",
+                            f"- 🔱 Forks: {repo['forks_count']}",
+                            f"- 🐛 Open Issues: {repo['open_issues_count']}",
+                            f"- 📏 Size: {repo['size']} KB",
+                            f"- 📅 Created: {repo['created_at'][:10]}",
+                            f"- 🔄 Last Updated: {repo['pushed_at'][:10]}"
+                        ]))
                     
-                    df_activity = pd.DataFrame(repo_updates)
-                    df_activity = df_activity.sort_values('Last Updated', ascending=False)
+                    with col_right:
+                        if repo.get('languages'):
+                            st.write("**Languages Used**")
+                            st.plotly_chart(build_repo_lang_pie(tuple(repo['languages'].items())), use_container_width=True)
                     
-                    fig = px.bar(
-                        df_activity, 
-                        x='Repository', 
-                        y='Stars',
-                        title='Repository Stars',
-                        color='Stars',
-                        color_continuous_scale='Viridis'
-                    )
-                    fig.update_layout(
-                        paper_bgcolor="rgba(0,0,0,0)",
-                        plot_bgcolor="rgba(0,0,0,0)",
-                        font_color="white"
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
+                    # README Preview
+                    if repo.get('readme_preview'):
+                        st.write("**README Preview**")
+                        st.text(repo['readme_preview'][:300] + "...")
+                    else:
+                        st.warning("⚠️ No README found for this repository")
+            
+            with tab3:
+                # Recommendations Tab
+                st.subheader("💡 Actionable Recommendations")
                 
-                with tab2:
-                    # Repository Analysis Tab
-                    st.subheader("📁 Repository Deep Dive")
-                    
-                    # Repository selector
-                    repo_names = [r['name'] for r in data['repos']]
-                    selected_repo = st.selectbox("Select Repository to Analyze", repo_names)
-                    
-                    if selected_repo:
-                        repo = next(r for r in data['repos'] if r['name'] == selected_repo)
-                        
-                        col1, col2, col3 = st.columns(3)
-                        col1.metric("📝 Documentation", f"{repo['doc_score']}/100")
-                        col2.metric("💻 Code Quality", f"{repo['code_score']}/100")
-                        col3.metric("⚡ Activity", f"{repo['activity_score']}/100")
-                        
-                        # Repository details
-                        st.write("---")
-                        col_left, col_right = st.columns(2)
-                        
-                        with col_left:
-                            st.write("**Repository Stats**")
-                            st.write(f"- ⭐ Stars: {repo['stargazers_count']}")
-                            st.write(f"- 🔱 Forks: {repo['forks_count']}")
-                            st.write(f"- 🐛 Open Issues: {repo['open_issues_count']}")
-                            st.write(f"- 📏 Size: {repo['size']} KB")
-                            st.write(f"- 📅 Created: {repo['created_at'][:10]}")
-                            st.write(f"- 🔄 Last Updated: {repo['pushed_at'][:10]}")
-                        
-                        with col_right:
-                            if repo.get('languages'):
-                                st.write("**Languages Used**")
-                                lang_df = pd.DataFrame(
-                                    list(repo['languages'].items()), 
-                                    columns=['Language', 'Bytes']
-                                )
-                                fig = px.pie(
-                                    lang_df, 
-                                    values='Bytes', 
-                                    names='Language',
-                                    hole=0.3
-                                )
-                                fig.update_layout(
-                                    paper_bgcolor="rgba(0,0,0,0)",
-                                    font_color="white",
-                                    height=300
-                                )
-                                st.plotly_chart(fig, use_container_width=True)
-                        
-                        # README Preview
-                        if repo.get('readme_preview'):
-                            st.write("**README Preview**")
-                            st.text(repo['readme_preview'][:300] + "...")
-                        else:
-                            st.warning("⚠️ No README found for this repository")
+                # Display AI recommendations if available
+                if ai_result and 'improve_repos' in ai_result:
+                    st.write("### 📌 Top Repositories to Improve")
+                    for item in ai_result['improve_repos'][:3]:
+                        with st.expander(f"🔧 {item['name']}"):
+                            st.write(item['improvement'])
                 
-                with tab3:
-                    # Recommendations Tab
-                    st.subheader("💡 Actionable Recommendations")
-                    
-                    # Display AI recommendations if available
-                    if ai_result and 'improve_repos' in ai_result:
-                        st.write("### 📌 Top Repositories to Improve")
-                        for item in ai_result['improve_repos'][:3]:
-                            with st.expander(f"🔧 {item['name']}"):
-                                st.write(item['improvement'])
+                if ai_result and 'archive_repos' in ai_result:
+                    st.write("### 🗑️ Repositories to Consider Archiving")
+                    for item in ai_result['archive_repos'][:3]:
+                        with st.expander(f"📦 {item['name']}"):
+                            st.write(item['reason'])
+                
+                # Display metric-based recommendations
+                st.write("### 🎯 Priority Improvements")
+                for i, rec in enumerate(recommendations[:3], 1):
+                    with st.container():
+                        st.markdown(f"""
+                        **{i}. {rec['repo']}** - *{rec['issue']}*
+                        - 🔹 **Action:** {rec['action']}
+                        - ⚡ **Priority:** {rec['priority']}
+                        ---
+                        """)
+                
+                # General advice
+                st.write("### 📈 Recruiter's Perspective")
+                st.info("""
+                **What recruiters look for:**
+                1. **Clean, well-documented code** - Shows professionalism
+                2. **Consistent commit history** - Demonstrates dedication
+                3. **Diverse tech stack** - Indicates adaptability
+                4. **Project completeness** - Proves ability to ship
+                5. **Community engagement** - Shows collaboration skills
+                """)
+            
+            with tab4:
+                # Interview Prep Tab
+                if ai_result and 'interview_questions' in ai_result:
+                    st.subheader("🎤 Technical Interview Questions")
+                    st.write("Based on the candidate's actual projects:")
                     
-                    if ai_result and 'archive_repos' in ai_result:
-                        st.write("### 🗑️ Repositories to Consider Archiving")
-                        for item in ai_result['archive_repos'][:3]:
-                            with st.expander(f"📦 {item['name']}"):
-                                st.write(item['reason'])
+                    for i, q in enumerate(ai_result['interview_questions'], 1):
+                        with st.expander(f"Question {i}"):
+                            st.write(q)
                     
-                    # Display metric-based recommendations
-                    st.write("### 🎯 Priority Improvements")
-                    for i, rec in enumerate(recommendations[:3], 1):
-                        with st.container():
-                            st.markdown(f"""
-                            **{i}. {rec['repo']}** - *{rec['issue']}*
-                            - 🔹 **Action:** {rec['action']}
-                            - ⚡ **Priority:** {rec['priority']}
-                            ---
-                            """)
+                    st.subheader("🧠 Skills Assessment")
                     
-                    # General advice
-                    st.write("### 📈 Recruiter's Perspective")
-                    st.info("""
-                    **What recruiters look for:**
-                    1. **Clean, well-documented code** - Shows professionalism
-                    2. **Consistent commit history** - Demonstrates dedication
-                    3. **Diverse tech stack** - Indicates adaptability
-                    4. **Project completeness** - Proves ability to ship
-                    5. **Community engagement** - Shows collaboration skills
-                    """)
-                
-                with tab4:
-                    # Interview Prep Tab
-                    if ai_result and 'interview_questions' in ai_result:
-                        st.subheader("🎤 Technical Interview Questions")
-                        st.write("Based on the candidate's actual projects:")
-                        
-                        for i, q in enumerate(ai_result['interview_questions'], 1):
-                            with st.expander(f"Question {i}"):
-                                st.write(q)
+                    # Skills display
+                    if 'skills' in ai_result:
+                        col1, col2 = st.columns(2)
                         
-                        st.subheader("🧠 Skills Assessment")
+                        with col1:
+                            st.write("**Technical Skills**")
+                            st.plotly_chart(build_skills_bar(tuple(ai_result['skills'].items()), 'Viridis'), use_container_width=True)
                         
-                        # Skills display
-                        if 'skills' in ai_result:
-                            col1, col2 = st.columns(2)
-                            
-                            with col1:
-                                st.write("**Technical Skills**")
-                                skills_df = pd.DataFrame(
-                                    list(ai_result['skills'].items()),
-                                    columns=['Skill', 'Proficiency']
-                                )
-                                fig = px.bar(
-                                    skills_df,
-                                    x='Proficiency',
-                                    y='Skill',
-                                    orientation='h',
-                                    color='Proficiency',
-                                    color_continuous_scale='Viridis'
-                                )
-                                fig.update_layout(
-                                    paper_bgcolor="rgba(0,0,0,0)",
-                                    plot_bgcolor="rgba(0,0,0,0)",
-                                    font_color="white",
-                                    height=300
-                                )
-                                st.plotly_chart(fig, use_container_width=True)
-                            
-                            with col2:
-                                if 'soft_skills' in ai_result:
-                                    st.write("**Soft Skills**")
-                                    soft_df = pd.DataFrame(
-                                        list(ai_result['soft_skills'].items()),
-                                        columns=['Skill', 'Proficiency']
-                                    )
-                                    fig = px.bar(
-                                        soft_df,
-                                        x='Proficiency',
-                                        y='Skill',
-                                        orientation='h',
-                                        color='Proficiency',
-                                        color_continuous_scale='Plasma'
-                                    )
-                                    fig.update_layout(
-                                        paper_bgcolor="rgba(0,0,0,0)",
-                                        plot_bgcolor="rgba(0,0,0,0)",
-                                        font_color="white",
-                                        height=300
-                                    )
-                                    st.plotly_chart(fig, use_container_width=True)
-                    else:
-                        st.warning("Interview questions could not be generated. Please try again.")
-                
-                # Footer with key insights
-                st.markdown("---")
-                st.subheader("🎯 Key Takeaways")
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    if ai_result:
-                        st.success("✅ **Top Strengths**")
-                        for p in ai_result['pros'][:3]:
-                            st.write(f"• {p}")
-                
-                with col2:
-                    if ai_result:
-                        st.error("🚩 **Areas for Improvement**")
-                        for c in ai_result['cons'][:3]:
-                            st.write(f"• {c}")
-                
-                # Export functionality
-                st.markdown("---")
-                if st.button("📥 Export Analysis Report"):
-                    # Create report data
-                    report = {
-                        'username': username,
-                        'portfolio_score': portfolio_score,
-                        'dimension_scores': dimension_scores,
-                        'ai_analysis': ai_result,
-                        'repositories': [
-                            {
-                                'name': r['name'],
-                                'stars': r['stargazers_count'],
-                                'forks': r['forks_count'],
-                                'doc_score': r['doc_score']
-                            } for r in data['repos'][:10]
-                        ]
-                    }
-                    
-                    # Convert to JSON and offer download
-                    report_json = json.dumps(report, indent=2)
-                    st.download_button(
-                        label="⬇️ Download JSON Report",
-                        data=report_json,
-                        file_name=f"github_audit_{username}.json",
-                        mime="application/json"
-                    )
\ No newline at end of file
+                        with col2:
+                            if 'soft_skills' in ai_result:
+                                st.write("**Soft Skills**")
+                                st.plotly_chart(build_skills_bar(tuple(ai_result['soft_skills'].items()), 'Plasma'), use_container_width=True)
+                else:
+                    st.warning("Interview questions could not be generated. Please try again.")
+            
+            # Footer with key insights
+            st.markdown("---")
+            st.subheader("🎯 Key Takeaways")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                if ai_result:
+                    st.success("✅ **Top Strengths**")
+                    st.markdown("\n".join(f"- {p}" for p in ai_result['pros'][:3]))
+            
+            with col2:
+                if ai_result:
+                    st.error("🚩 **Areas for Improvement**")
+                    st.markdown("\n".join(f"- {c}" for c in ai_result['cons'][:3]))
+            
+            # Export functionality
+            st.markdown("---")
+            fmt_col, pretty_col = st.columns(2)
+            with fmt_col:
+                export_format = st.radio("Format", list(EXPORT_FORMATS), key="export_format", horizontal=True)
+            with pretty_col:
+                pretty_json = st.checkbox("Pretty-print JSON", key="pretty_json", disabled=export_format != 'JSON')
+            # Memoized per session on a cheap fingerprint; only the latest (report_key, bytes)
+            # pair is kept, replaced on a miss. A failed AI call is retried on the next rerun
+            # (never cached), so whether ai_result arrived is part of the key; a successful
+            # ai_result is cached per data_version, which pins its content.
+            report_key = (
+                username, data_version, ai_result is not None, portfolio_score,
+                tuple(sorted(dimension_scores.items())), pretty_json, export_format
+            )
+            cached_key, report_bytes = st.session_state.get('report_cache', (None, None))
+            if cached_key != report_key:
+                repos_slice = tuple(ReportRepo._make(_report_fields(r)) for r in islice(data['repos'], 10))
+                report_bytes = _maybe_profile(
+                    _build_report,
+                    username, portfolio_score, dimension_scores, ai_result, repos_slice,
+                    pretty_json, export_format
+                )
+                st.session_state['report_cache'] = (report_key, report_bytes)
+            mime, ext = EXPORT_FORMATS[export_format]
+            st.download_button(
+                label="📥 Export Analysis Report",
+                data=report_bytes,
+                file_name=f"github_audit_{username}.{ext}",
+                mime=mime
+            )
\ No newline at end of file